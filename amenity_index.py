@@ -0,0 +1,311 @@
+#file: amenity_index.py
+
+import argparse
+import bz2
+import gzip
+import heapq
+import json
+import math
+import xml.etree.ElementTree as ET
+
+DEFAULT_INDEX_PATH = "amenities.json"
+DEFAULT_AMENITIES = ["pub", "cafe", "restaurant", "bar", "biergarten", "fast_food"]
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Calculate distance in km between two points."""
+    R = 6371
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = (math.sin(dlat/2)**2 +
+         math.cos(math.radians(lat1)) *
+         math.cos(math.radians(lat2)) *
+         math.sin(dlon/2)**2)
+    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def build_place(lat, lon, plat, plon, tags):
+    """Build a place dict in the shape returned by CommunicatorAgent.get_nearby_places."""
+    return {
+        "name": tags.get("name", "Unknown"),
+        "lat": plat,
+        "lon": plon,
+        "distance_km": round(haversine(lat, lon, plat, plon), 2),
+        "description": ", ".join(f"{k}: {v}" for k, v in tags.items())
+    }
+
+
+class MissingBoundsError(ValueError):
+    """Raised when an import cannot tell which region the data covers."""
+
+
+class AmenityIndex:
+    """
+    In-memory spatial index of OSM amenities, bucketed on a lat/lon grid.
+
+    Built once from a local OSM extract or an Overpass JSON dump (see the
+    import command at the bottom of this file) and saved as JSON, so pub/cafe
+    lookups can be answered without calling Overpass.
+    """
+
+    def __init__(self, places=None, bounds=None, cell_deg=0.05):
+        """
+        Args:
+            places (list): Dicts with "lat", "lon" and "tags".
+            bounds (list): [min_lat, min_lon, max_lat, max_lon] covered by the data.
+                           Without bounds the index covers nothing and every
+                           lookup goes to the network.
+            cell_deg (float): Grid cell size in degrees (0.05 is roughly 5 km).
+        """
+        self.cell_deg = cell_deg
+        self.places = []
+        self.grid = {}
+        for p in places or []:
+            self.add(p["lat"], p["lon"], p["tags"])
+
+        self.bounds = bounds
+
+    def __len__(self):
+        return len(self.places)
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    def add(self, lat, lon, tags):
+        place = {"lat": float(lat), "lon": float(lon), "tags": tags}
+        self.places.append(place)
+        self.grid.setdefault(self._cell(place["lat"], place["lon"]), []).append(place)
+
+    def edge_distance_km(self, lat, lon):
+        """Distance from a point to the nearest edge of the indexed region (0 if outside)."""
+        if not self.bounds:
+            return 0.0
+        min_lat, min_lon, max_lat, max_lon = self.bounds
+        if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+            return 0.0
+        R = 6371
+        # North/south edges are parallels; east/west edges are meridians
+        to_lat_edge = R * math.radians(min(lat - min_lat, max_lat - lat))
+        dlon = math.radians(min(lon - min_lon, max_lon - lon))
+        to_lon_edge = R * math.asin(min(1.0, abs(math.sin(dlon)) * math.cos(math.radians(lat))))
+        return min(to_lat_edge, to_lon_edge)
+
+    def covers(self, lat, lon, radius=0):
+        """True if the whole search circle (radius in meters) lies inside the indexed region."""
+        if not self.bounds:
+            return False
+        min_lat, min_lon, max_lat, max_lon = self.bounds
+        if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+            return False
+        return self.edge_distance_km(lat, lon) >= radius / 1000.0
+
+    def answers(self, lat, lon, radius, places, limit):
+        """
+        True if query() results for this search are complete.
+
+        Either the search circle fits inside the region, or the k-th place is
+        closer than the region edge, so nothing outside could rank higher.
+        """
+        if self.covers(lat, lon, radius):
+            return True
+        if not self.covers(lat, lon) or limit is None or len(places) < limit:
+            return False
+        return places[-1]["distance_km"] < self.edge_distance_km(lat, lon)
+
+    def query(self, lat, lon, radius=10000, place_types=None, limit=3):
+        """
+        Find the nearest amenities within a radius.
+
+        Args:
+            lat (float): Latitude of the search centre.
+            lon (float): Longitude of the search centre.
+            radius (int): Search radius in meters.
+            place_types (list or str): Amenities to include, or None for all.
+            limit (int): Number of results to return (top-k), or None for all.
+        Returns:
+            list: Places sorted by distance, same shape as get_nearby_places.
+        """
+        if isinstance(place_types, str):
+            place_types = [place_types]
+        wanted = set(place_types) if place_types else None
+
+        radius_km = radius / 1000.0
+        # Only visit grid cells that overlap the radius
+        dlat = radius_km / 111.0
+        dlon = radius_km / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+        min_cell = self._cell(lat - dlat, lon - dlon)
+        max_cell = self._cell(lat + dlat, lon + dlon)
+
+        results = []
+        for ci in range(min_cell[0], max_cell[0] + 1):
+            for cj in range(min_cell[1], max_cell[1] + 1):
+                for p in self.grid.get((ci, cj), []):
+                    if wanted is not None and p["tags"].get("amenity") not in wanted:
+                        continue
+                    place = build_place(lat, lon, p["lat"], p["lon"], p["tags"])
+                    if place["distance_km"] <= radius_km:
+                        results.append(place)
+
+        if limit is None:
+            return sorted(results, key=lambda x: x["distance_km"])
+        return heapq.nsmallest(limit, results, key=lambda x: x["distance_km"])
+
+    # --- Persistence ---
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        data = {
+            "version": 1,
+            "cell_deg": self.cell_deg,
+            "bounds": self.bounds,
+            "places": self.places
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("places", []), data.get("bounds"), data.get("cell_deg", 0.05))
+
+    # --- Importers ---
+
+    @classmethod
+    def from_overpass_json(cls, path, amenities=None, bounds=None, cell_deg=0.05):
+        """
+        Build an index from a saved Overpass response (use "out center;" for ways).
+
+        Overpass responses do not record the area that was queried, so bounds
+        (the query's bbox) must be given.
+        """
+        if bounds is None:
+            raise MissingBoundsError("Overpass JSON has no bounds; pass the bbox that was queried")
+
+        with _open(path) as f:
+            raw_json = json.load(f)
+
+        index = cls(bounds=bounds, cell_deg=cell_deg)
+        for el in raw_json.get("elements", []):
+            tags = el.get("tags", {})
+            if not _wanted(tags, amenities):
+                continue
+            coords = el if "lat" in el else el.get("center", {})
+            try:
+                index.add(float(coords["lat"]), float(coords["lon"]), tags)
+            except (KeyError, ValueError, TypeError):
+                continue  # skip elements without usable coordinates
+
+        return index
+
+    @classmethod
+    def from_osm_xml(cls, path, amenities=None, bounds=None, cell_deg=0.05):
+        """
+        Build an index from an OSM XML extract (.osm, .osm.gz or .osm.bz2).
+
+        Amenity ways (e.g. pub buildings) are placed at the average of their
+        nodes. The covered region comes from bounds, else the file's <bounds>.
+        PBF extracts can be converted first with "osmium cat x.pbf -o x.osm".
+        """
+        # Pass 1: find amenity ways and the nodes they need
+        way_refs = {}
+        for elem in _iter_osm(path):
+            if elem.tag == "way":
+                tags = {t.get("k"): t.get("v") for t in elem.findall("tag")}
+                if _wanted(tags, amenities):
+                    way_refs[elem.get("id")] = ([nd.get("ref") for nd in elem.findall("nd")], tags)
+
+        needed = {ref for refs, _ in way_refs.values() for ref in refs}
+
+        # Pass 2: collect amenity nodes and coordinates for amenity ways
+        index = cls(bounds=bounds, cell_deg=cell_deg)
+        coords = {}
+        for elem in _iter_osm(path):
+            if elem.tag == "bounds" and index.bounds is None:
+                index.bounds = [float(elem.get(k)) for k in ("minlat", "minlon", "maxlat", "maxlon")]
+            elif elem.tag == "node":
+                node_id = elem.get("id")
+                lat, lon = float(elem.get("lat")), float(elem.get("lon"))
+                if node_id in needed:
+                    coords[node_id] = (lat, lon)
+                tags = {t.get("k"): t.get("v") for t in elem.findall("tag")}
+                if _wanted(tags, amenities):
+                    index.add(lat, lon, tags)
+
+        for refs, tags in way_refs.values():
+            points = [coords[r] for r in refs if r in coords]
+            if points:
+                index.add(sum(p[0] for p in points) / len(points),
+                          sum(p[1] for p in points) / len(points), tags)
+
+        if index.bounds is None:
+            raise MissingBoundsError("OSM extract has no <bounds> element; pass the region's bbox")
+        return index
+
+
+def _open(path):
+    """Open a plain, gzip or bz2 file in binary mode."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+def _iter_osm(path):
+    """
+    Yield each top-level element of an OSM XML file (bounds, node, way, ...).
+
+    The root is cleared after every element so memory stays flat however
+    large the extract is.
+    """
+    with _open(path) as f:
+        context = ET.iterparse(f, events=("start", "end"))
+        _, root = next(context)
+        depth = 0
+        for event, elem in context:
+            if event == "start":
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 0:
+                yield elem
+                root.clear()
+
+
+def _wanted(tags, amenities):
+    amenity = tags.get("amenity")
+    if not amenity:
+        return False
+    return amenities is None or amenity in amenities
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import an OSM extract or Overpass JSON dump into a local amenity index.")
+    parser.add_argument("source", help="Overpass JSON (.json) or OSM XML (.osm, .osm.gz, .osm.bz2)")
+    parser.add_argument("--out", default=DEFAULT_INDEX_PATH, help="Where to write the index")
+    parser.add_argument("--amenities", nargs="*", default=DEFAULT_AMENITIES,
+                        help="Amenity values to keep (pass with no values to keep all)")
+    parser.add_argument("--bbox", nargs=4, type=float, metavar=("MIN_LAT", "MIN_LON", "MAX_LAT", "MAX_LON"),
+                        help="Region covered by the data (required for Overpass JSON; "
+                             "defaults to <bounds> for OSM XML)")
+    parser.add_argument("--cell-deg", type=float, default=0.05, help="Grid cell size in degrees")
+    args = parser.parse_args()
+
+    amenities = args.amenities or None
+    name = args.source.lower()
+    try:
+        if name.endswith((".json", ".json.gz", ".json.bz2")):
+            index = AmenityIndex.from_overpass_json(args.source, amenities, args.bbox, args.cell_deg)
+        else:
+            index = AmenityIndex.from_osm_xml(args.source, amenities, args.bbox, args.cell_deg)
+    except MissingBoundsError as e:
+        parser.error(f"{e} (--bbox MIN_LAT MIN_LON MAX_LAT MAX_LON)")
+    except (ValueError, ET.ParseError) as e:
+        parser.error(f"could not import {args.source}: {e}")
+
+    index.save(args.out)
+    print(f"Indexed {len(index)} amenities covering {index.bounds} -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,36 @@
 
 # file: communicator_agent.py
 
+import os
 import requests
-import math
+from amenity_index import AmenityIndex, DEFAULT_INDEX_PATH, build_place, haversine
 
 OVERPASS_URL = "https://overpass-api.de/api/interpreter"
 
 class CommunicatorAgent:
-    """Fetch nearby pubs/cafes using OpenStreetMap Overpass API."""
+    """Fetch nearby pubs/cafes from a local amenity index, falling back to the Overpass API."""
+
+    def __init__(self, index_path=DEFAULT_INDEX_PATH, network_fallback=True, http=None):
+        """
+        Args:
+            index_path (str): Amenity index built with amenity_index.py; skipped if missing.
+            network_fallback (bool): Query Overpass when the index is missing or
+                                     does not fully cover the search.
+            http: Object with a requests-style post(); defaults to requests
+                  (load_test.py injects a fake Overpass here).
+        """
+        self.http = http or requests
+        self.index = None
+        if index_path and os.path.exists(index_path):
+            try:
+                self.index = AmenityIndex.load(index_path)
+            except (OSError, ValueError, KeyError) as e:
+                print("DEBUG — Could not load amenity index:", e)
+        self.network_fallback = network_fallback
 
     def haversine(self, lat1, lon1, lat2, lon2):
         """Calculate distance in km between two points."""
-        R = 6371
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
-        a = (math.sin(dlat/2)**2 +
-             math.cos(math.radians(lat1)) *
-             math.cos(math.radians(lat2)) *
-             math.sin(dlon/2)**2)
-        return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+        return haversine(lat1, lon1, lat2, lon2)
 
     def build_query(self, lat, lon, radius, amenities):
         """Construct Overpass QL query for one or more amenities."""
@@ -26,18 +38,20 @@ class CommunicatorAgent:
         if isinstance(amenities, str):
             amenities = [amenities]
 
-        # Build query for each amenity
+        # Build query for each amenity; ways (e.g. pub buildings) come back at
+        # their centre, matching how the local amenity index stores them
         amenity_filters = "".join([
-            f'node["amenity"="{a}"](around:{radius},{lat},{lon});' for a in amenities
+            f'{kind}["amenity"="{a}"](around:{radius},{lat},{lon});'
+            for a in amenities for kind in ("node", "way")
         ])
 
         return f"""
         [out:json][timeout:25];
-        {amenity_filters}
-        out;
+        ({amenity_filters});
+        out center;
         """
 
-    def get_nearby_places(self, lat, lon, radius=10000, place_types=None):
+    def get_nearby_places(self, lat, lon, radius=10000, place_types=None, limit=3):
         """
         Fetch nearby pubs or cafes and return a list with distances and descriptions.
 
@@ -46,8 +60,9 @@ class CommunicatorAgent:
             lon (float): Longitude of the trail.
             radius (int): Search radius in meters.
             place_types (list or str): List of amenities (e.g., ["cafe","pub"]) or single string.
+            limit (int): Number of nearest places to return.
         Returns:
-            list: Top 3 nearest places with name, lat, lon, distance_km, description.
+            list: Nearest places with name, lat, lon, distance_km, description.
         """
         if place_types is None:
             place_types = ["cafe", "pub"]
@@ -60,44 +75,47 @@ class CommunicatorAgent:
             print("DEBUG — Invalid trail coordinates:", lat, lon)
             return []
 
+        # Answer locally when the index can see the whole neighbourhood
+        local = None
+        if self.index is not None and self.index.covers(lat, lon):
+            local = self.index.query(lat, lon, radius, place_types, limit)
+            if self.index.answers(lat, lon, radius, local, limit):
+                return local
+
+        if not self.network_fallback:
+            return local or []
+
         #print(f"DEBUG — Sending query for {place_types} near trail at Lat: {lat}, Lng: {lon}")
 
         query = self.build_query(lat, lon, radius, place_types)
 
         try:
-            response = requests.post(OVERPASS_URL, data=query, timeout=30)
+            response = self.http.post(OVERPASS_URL, data=query, timeout=30)
             response.raise_for_status()
         except Exception as e:
             print("DEBUG — Overpass request error:", e)
-            return []
+            return local or []  # partial local answer beats nothing
 
         try:
             raw_json = response.json()
         except Exception as e:
             #print("DEBUG — Could not parse JSON:", e)
-            return []
+            return local or []
 
         elements = raw_json.get("elements", [])
         results = []
 
         for el in elements:
             tags = el.get("tags", {})
-            name = tags.get("name", "Unknown")
+            coords = el if "lat" in el else el.get("center", {})
             try:
-                plat = float(el.get("lat", 0))
-                plon = float(el.get("lon", 0))
-            except (ValueError, TypeError):
+                plat = float(coords["lat"])
+                plon = float(coords["lon"])
+            except (KeyError, ValueError, TypeError):
                 continue  # skip invalid coordinates
 
-            distance = round(self.haversine(lat, lon, plat, plon), 2)
-            results.append({
-                "name": name,
-                "lat": plat,
-                "lon": plon,
-                "distance_km": distance,
-                "description": ", ".join(f"{k}: {v}" for k, v in tags.items())
-            })
+            results.append(build_place(lat, lon, plat, plon, tags))
 
-        # Sort by distance and return top 3
+        # Sort by distance and return the nearest
         results.sort(key=lambda x: x["distance_km"])
-        return results[:3]
+        return results[:limit]
@@ -1,24 +1,111 @@
 # file: data_agent.py
 
+import logging
+import time
 import requests
 
+logger = logging.getLogger(__name__)
+
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+
 class DataAgent:
     """Fetch weather data (using free APIs)."""
 
+    def __init__(self, max_age=1800, http=None):
+        """
+        Args:
+            max_age (int): Seconds a snapshot entry stays usable before
+                           get_weather goes back to the network.
+            http: Object with a requests-style get(); defaults to requests
+                  (load_test.py injects a fake Open-Meteo here).
+        """
+        self.http = http or requests
+        # (lat, lng) -> {"weather": {...}, "fetched_at": epoch seconds}
+        # Filled by refresh_weather, e.g. from a WeatherRefresher thread
+        self.snapshot = {}
+        self.max_age = max_age
+        # Last refresh_weather failure (None after a success); it runs in the
+        # background, so errors are kept here rather than printed over the prompt
+        self.last_refresh_error = None
+
+    def location_key(self, lat, lng):
+        """Normalise coordinates (floats or CSV strings) into a snapshot key."""
+        try:
+            return (round(float(lat), 4), round(float(lng), 4))
+        except (ValueError, TypeError):
+            return None
+
+    def get_cached_weather(self, lat, lng):
+        """Return snapshot weather for a location if it is fresh enough, else None."""
+        key = self.location_key(lat, lng)
+        entry = self.snapshot.get(key) if key else None
+        if entry and time.time() - entry["fetched_at"] <= self.max_age:
+            return entry["weather"]
+        return None
+
+    def parse_current_weather(self, payload):
+        data = payload.get("current_weather", {})
+        return {
+            "temperature": data.get("temperature", 0.0),
+            "windspeed": data.get("windspeed", 0.0),
+            "weather_code": data.get("weathercode", 0)
+        }
+
     def get_weather(self, lat, lng):
+        # Serve from the background snapshot when possible
+        cached = self.get_cached_weather(lat, lng)
+        if cached:
+            return cached
+
         # Example using Open-Meteo free API
-        url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lng}&current_weather=true"
+        url = f"{OPEN_METEO_URL}?latitude={lat}&longitude={lng}&current_weather=true"
         try:
-            r = requests.get(url, timeout=5)
-            data = r.json().get("current_weather", {})
-            return {
-                "temperature": data.get("temperature", 0.0),
-                "windspeed": data.get("windspeed", 0.0),
-                "weather_code": data.get("weathercode", 0)
-            }
+            r = self.http.get(url, timeout=5)
+            return self.parse_current_weather(r.json())
         except Exception:
             return {"temperature": 0.0, "windspeed": 0.0, "weather_code": 0}
 
+    def refresh_weather(self, locations):
+        """
+        Fetch current weather for many locations in one Open-Meteo request
+        and store the results in the snapshot.
+
+        Args:
+            locations (list): (lat, lng) pairs.
+        Returns:
+            int: Number of locations updated.
+        """
+        keys = [k for k in (self.location_key(lat, lng) for lat, lng in locations) if k]
+        if not keys:
+            return 0
+
+        params = {
+            "latitude": ",".join(str(k[0]) for k in keys),
+            "longitude": ",".join(str(k[1]) for k in keys),
+            "current_weather": "true"
+        }
+        try:
+            r = self.http.get(OPEN_METEO_URL, params=params, timeout=10)
+            r.raise_for_status()
+            payload = r.json()
+        except Exception as e:
+            logger.debug("Open-Meteo batch error: %s", e)
+            self.last_refresh_error = e
+            return 0
+
+        # A single location comes back as an object, several as a list
+        if isinstance(payload, dict):
+            payload = [payload]
+
+        self.last_refresh_error = None
+        fetched_at = time.time()
+        for key, item in zip(keys, payload):
+            self.snapshot[key] = {
+                "weather": self.parse_current_weather(item),
+                "fetched_at": fetched_at
+            }
+        return min(len(keys), len(payload))
+
     def map_weather_code(self, code):
         # Simplified mapping
         mapping = {
@@ -0,0 +1,367 @@
+#file: load_test.py
+
+import argparse
+import json
+import math
+import random
+import re
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from planner_agent import PlannerAgent
+from data_agent import DataAgent
+from communicator_agent import CommunicatorAgent
+from root_agent import RootAgent
+from weather_refresher import WeatherRefresher
+
+TURN_NAMES = ["difficulty", "distance", "scenery", "route", "weather", "pubs"]
+
+
+class LatencyProfile:
+    """Simulated latency and failure behaviour for a fake agent."""
+
+    DISTRIBUTIONS = ["fixed", "uniform", "normal", "lognormal"]
+
+    def __init__(self, mean_ms=50.0, jitter_ms=20.0, error_rate=0.0, distribution="normal", seed=None):
+        """
+        Args:
+            mean_ms (float): Typical latency of one call in milliseconds.
+            jitter_ms (float): Spread around the mean (half-width for uniform, standard deviation otherwise).
+            error_rate (float): Probability (0-1) that a call fails.
+            distribution (str): One of DISTRIBUTIONS.
+            seed (int): Optional seed for reproducible runs.
+        """
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.mean_ms = mean_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.distribution = distribution
+        self.rng = random.Random(seed)
+
+    def sample_ms(self):
+        """Draw one latency value in milliseconds (never negative)."""
+        if self.distribution == "fixed":
+            value = self.mean_ms
+        elif self.distribution == "uniform":
+            value = self.rng.uniform(self.mean_ms - self.jitter_ms, self.mean_ms + self.jitter_ms)
+        elif self.distribution == "normal":
+            value = self.rng.gauss(self.mean_ms, self.jitter_ms)
+        else:
+            # Lognormal whose mean and standard deviation are mean_ms and jitter_ms
+            if self.mean_ms <= 0:
+                return 0.0
+            sigma2 = math.log(1 + (self.jitter_ms / self.mean_ms) ** 2)
+            mu = math.log(self.mean_ms) - sigma2 / 2
+            value = self.rng.lognormvariate(mu, math.sqrt(sigma2))
+        return max(0.0, value)
+
+    def simulate(self):
+        """Sleep for one sampled latency; return True if the call should fail."""
+        time.sleep(self.sample_ms() / 1000.0)
+        return self.rng.random() < self.error_rate
+
+
+class FakeGeminiAgent:
+    """Stand-in for GeminiAgent: no API key, no network, same ask_gemini() contract."""
+
+    def __init__(self, profile=None, reply_chars=400):
+        self.profile = profile or LatencyProfile(mean_ms=400, jitter_ms=150)
+        self.reply_chars = reply_chars
+
+    def ask_gemini(self, prompt, max_output_tokens=500):
+        # Errors are swallowed by the real agent, which returns ""
+        if self.profile.simulate():
+            return ""
+
+        # Trail selection prompt expects JSON naming one of the candidates
+        if "Respond ONLY in JSON" in prompt:
+            names = re.findall(r"- Name: (.+)", prompt)
+            best = self.profile.rng.choice(names) if names else ""
+            return json.dumps({"best_trail": best, "reasoning": "Simulated selection."})
+
+        filler = "Lovely day for a walk on the fells. "
+        return (filler * (self.reply_chars // len(filler) + 1))[:self.reply_chars]
+
+
+class FakeResponse:
+    """Minimal requests.Response stand-in."""
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeOpenMeteo:
+    """Stand-in for requests as used by DataAgent: invents Open-Meteo current weather."""
+
+    def __init__(self, profile=None):
+        self.profile = profile or LatencyProfile(mean_ms=150, jitter_ms=50)
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        # One latency sample per HTTP request, however many locations it asks for
+        if self.profile.simulate():
+            raise ConnectionError("Simulated Open-Meteo failure")
+
+        if params is None:
+            params = {k: v[0] for k, v in parse_qs(urlsplit(url).query).items()}
+        rng = self.profile.rng
+        items = [
+            {
+                "latitude": float(lat),
+                "longitude": float(lng),
+                "current_weather": {
+                    "temperature": round(rng.uniform(-5, 25), 1),
+                    "windspeed": round(rng.uniform(0, 60), 1),
+                    "weathercode": rng.choice([0, 1, 2, 3, 61, 63, 71, 95])
+                }
+            }
+            for lat, lng in zip(str(params["latitude"]).split(","), str(params["longitude"]).split(","))
+        ]
+        return FakeResponse(items if len(items) > 1 else items[0])
+
+
+class FakeOverpass:
+    """Stand-in for requests as used by CommunicatorAgent: invents Overpass elements."""
+
+    def __init__(self, profile=None, place_count=20, description_chars=200):
+        """
+        Args:
+            profile (LatencyProfile): Latency/error behaviour.
+            place_count (int): Number of raw elements returned per query.
+            description_chars (int): Padding added to each element's tags.
+        """
+        self.profile = profile or LatencyProfile(mean_ms=1500, jitter_ms=1000, distribution="lognormal")
+        self.place_count = place_count
+        self.description_chars = description_chars
+        self.calls = 0
+
+    def post(self, url, data=None, timeout=None):
+        self.calls += 1
+        if self.profile.simulate():
+            raise ConnectionError("Simulated Overpass failure")
+
+        radius, lat, lon = re.search(r"around:(\d+),([-\d.]+),([-\d.]+)", data).groups()
+        lat, lon = float(lat), float(lon)
+        amenities = sorted(set(re.findall(r'"amenity"="([^"]+)"', data))) or ["cafe"]
+
+        rng = self.profile.rng
+        # Roughly convert the radius into a lat/lon box around the trail
+        spread = int(radius) / 111000.0
+        elements = []
+        for i in range(self.place_count):
+            amenity = rng.choice(amenities)
+            point = {"lat": lat + rng.uniform(-spread, spread), "lon": lon + rng.uniform(-spread, spread)}
+            tags = {"amenity": amenity, "name": f"Fake {amenity.title()} {i}", "note": "x" * self.description_chars}
+            # Mix in ways, which Overpass returns with a centre instead of lat/lon
+            if i % 4 == 3:
+                elements.append({"type": "way", "id": i, "center": point, "tags": tags})
+            else:
+                elements.append({"type": "node", "id": i, **point, "tags": tags})
+        return FakeResponse({"elements": elements})
+
+
+class FakeDataAgent(DataAgent):
+    """Real DataAgent (snapshot included) talking to a fake Open-Meteo."""
+
+    def __init__(self, profile=None, max_age=1800):
+        super().__init__(max_age=max_age, http=FakeOpenMeteo(profile))
+
+
+class FakeCommunicatorAgent(CommunicatorAgent):
+    """Real CommunicatorAgent (amenity index included) talking to a fake Overpass."""
+
+    def __init__(self, profile=None, place_count=20, description_chars=200, index_path=None,
+                 network_fallback=True):
+        super().__init__(index_path, network_fallback,
+                         http=FakeOverpass(profile, place_count, description_chars))
+
+
+def build_script(planner, rng):
+    """Build one conversation's user messages, aimed at a real catalog trail."""
+    trail = rng.choice(planner.trails)
+    tags = [t.strip() for t in trail.get("Tags", "").split(",") if t.strip()]
+    return [
+        trail["Difficulty"],
+        str(trail["Distance_km"] + 1),
+        rng.choice(tags) if tags else "",
+        trail.get("Route", "loop"),
+        "yes",
+        rng.choice(["yes", "pubs", "cafes"])
+    ]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def run_conversation(root, script):
+    """Drive one RootAgent through a script; return a list of (turn_name, seconds)."""
+    timings = []
+    for name, message in zip(TURN_NAMES, script):
+        start = time.perf_counter()
+        root.handle_message(message)
+        timings.append((name, time.perf_counter() - start))
+        if root.state["awaiting_input"] is None:
+            break
+    return timings
+
+
+def run_load(conversations=100, concurrency=8, planner=None, gemini=None, data_agent=None,
+             communicator=None, seed=None, weather_refresh=None):
+    """
+    Run many simulated conversations through RootAgent and collect statistics.
+
+    Each conversation gets its own RootAgent (one per user) sharing the planner
+    and the agents, as a multi-user deployment would.
+
+    Args:
+        weather_refresh (float): If set, run a WeatherRefresher on this interval
+                                 (seconds) so weather is served from the snapshot.
+    Returns:
+        dict: throughput, per-turn p50/p95/p99 latency (ms), memory usage and
+              the number of fake network requests made.
+    """
+    planner = planner or PlannerAgent()
+    gemini = gemini or FakeGeminiAgent()
+    data_agent = data_agent or FakeDataAgent()
+    communicator = communicator or FakeCommunicatorAgent()
+
+    rng = random.Random(seed)
+    scripts = [build_script(planner, rng) for _ in range(conversations)]
+
+    def worker(script):
+        root = RootAgent(planner, data_agent, communicator, gemini)
+        return run_conversation(root, script)
+
+    tracemalloc.start()
+    refresher = None
+    if weather_refresh:
+        # Warm the snapshot before timing, as a long-running deployment would be
+        refresher = WeatherRefresher(data_agent, planner.trails, interval=weather_refresh)
+        refresher.refresh_all()
+        refresher.start(warm=False)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        all_timings = list(pool.map(worker, scripts))
+    elapsed = time.perf_counter() - start
+
+    if refresher:
+        refresher.stop()
+    current_mem, peak_mem = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_turn = {name: [] for name in TURN_NAMES}
+    for timings in all_timings:
+        for name, seconds in timings:
+            per_turn[name].append(seconds * 1000.0)
+
+    total_turns = sum(len(t) for t in all_timings)
+    return {
+        "conversations": conversations,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "conversations_per_s": round(conversations / elapsed, 2) if elapsed else 0.0,
+        "turns_per_s": round(total_turns / elapsed, 2) if elapsed else 0.0,
+        "turns": {
+            name: {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50), 1),
+                "p95_ms": round(percentile(values, 95), 1),
+                "p99_ms": round(percentile(values, 99), 1)
+            }
+            for name, values in per_turn.items() if values
+        },
+        "memory": {
+            "current_kb": round(current_mem / 1024, 1),
+            "peak_kb": round(peak_mem / 1024, 1)
+        },
+        "network": {
+            "open_meteo_requests": getattr(getattr(data_agent, "http", None), "calls", None),
+            "overpass_requests": getattr(getattr(communicator, "http", None), "calls", None)
+        }
+    }
+
+
+def format_report(report):
+    """Render a run_load() report as a readable table."""
+    lines = [
+        f"Conversations: {report['conversations']} (concurrency {report['concurrency']})",
+        f"Elapsed: {report['elapsed_s']} s",
+        f"Throughput: {report['conversations_per_s']} conversations/s, {report['turns_per_s']} turns/s",
+        "",
+        f"{'turn':<12}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    ]
+    for name, stats in report["turns"].items():
+        lines.append(
+            f"{name:<12}{stats['count']:>8}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}"
+        )
+    lines.append("")
+    lines.append(
+        f"Memory (traced): current {report['memory']['current_kb']} KB, peak {report['memory']['peak_kb']} KB"
+    )
+    lines.append(
+        f"Network requests: Open-Meteo {report['network']['open_meteo_requests']}, "
+        f"Overpass {report['network']['overpass_requests']}"
+    )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for the AI Fell Buddy conversation.")
+    parser.add_argument("--conversations", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--csv", default="trails.csv", help="Trail catalog to load")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--distribution", choices=LatencyProfile.DISTRIBUTIONS, default="normal")
+    parser.add_argument("--gemini-ms", type=float, default=400)
+    parser.add_argument("--gemini-errors", type=float, default=0.0)
+    parser.add_argument("--gemini-chars", type=int, default=400, help="Reply size per Gemini call")
+    parser.add_argument("--weather-ms", type=float, default=150)
+    parser.add_argument("--weather-errors", type=float, default=0.0)
+    parser.add_argument("--places-ms", type=float, default=1500)
+    parser.add_argument("--places-errors", type=float, default=0.0)
+    parser.add_argument("--places-count", type=int, default=20, help="Raw places per Overpass query")
+    parser.add_argument("--index", default=None, help="Amenity index to answer place lookups locally")
+    parser.add_argument("--weather-refresh", type=float, default=0,
+                        help="Run the background weather refresher on this interval in seconds (0 = off)")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Jitter as a fraction of each mean")
+    parser.add_argument("--json", action="store_true", help="Print the raw report as JSON")
+    args = parser.parse_args()
+
+    def profile(mean_ms, error_rate, offset):
+        seed = None if args.seed is None else args.seed + offset
+        return LatencyProfile(mean_ms, mean_ms * args.jitter, error_rate, args.distribution, seed)
+
+    report = run_load(
+        conversations=args.conversations,
+        concurrency=args.concurrency,
+        planner=PlannerAgent(args.csv),
+        gemini=FakeGeminiAgent(profile(args.gemini_ms, args.gemini_errors, 1), args.gemini_chars),
+        data_agent=FakeDataAgent(profile(args.weather_ms, args.weather_errors, 2)),
+        communicator=FakeCommunicatorAgent(profile(args.places_ms, args.places_errors, 3), args.places_count,
+                                           index_path=args.index),
+        seed=args.seed,
+        weather_refresh=args.weather_refresh or None
+    )
+
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 #file: main.py
 
+import os
+from dotenv import load_dotenv
 from planner_agent import PlannerAgent
 from data_agent import DataAgent
 from communicator_agent import CommunicatorAgent
 from gemini_agent import GeminiAgent
 from root_agent import RootAgent
+from weather_refresher import WeatherRefresher
 
 def main():
     planner = PlannerAgent()
@@ -12,6 +15,17 @@ def main():
     communicator = CommunicatorAgent()
     gemini = GeminiAgent()
 
+    # Optional background weather refresh; set WEATHER_REFRESH_SECONDS=0 to disable
+    load_dotenv()
+    try:
+        refresh_seconds = int(os.getenv("WEATHER_REFRESH_SECONDS", "900"))
+    except ValueError:
+        print("Warning: WEATHER_REFRESH_SECONDS must be a whole number of seconds; using 900.")
+        refresh_seconds = 900
+    if refresh_seconds > 0:
+        data_agent.max_age = 2 * refresh_seconds
+        WeatherRefresher(data_agent, planner.trails, interval=refresh_seconds).start()
+
     root = RootAgent(planner, data_agent, communicator, gemini)
 
     print("Hey! Your AI Fell Buddy is ready! Let's go climb a fell!🌲")
@@ -0,0 +1,79 @@
+#file: weather_refresher.py
+
+import threading
+
+
+class WeatherRefresher:
+    """
+    Background thread that keeps DataAgent's weather snapshot warm for every
+    trail in the catalog, so the weather step rarely waits on Open-Meteo.
+    """
+
+    def __init__(self, data_agent, trails, interval=900, batch_size=50):
+        """
+        Args:
+            data_agent (DataAgent): Agent whose snapshot is refreshed.
+            trails (list): Trail dicts with "Lat" and "Lng" (e.g. PlannerAgent.trails).
+            interval (int): Seconds between full refreshes of the catalog (must be > 0).
+            batch_size (int): Locations per Open-Meteo request.
+        """
+        if interval <= 0:
+            raise ValueError("WeatherRefresher interval must be positive")
+        self.data_agent = data_agent
+        self.interval = interval
+        self.batch_size = max(1, batch_size)
+
+        # Deduplicate locations, keeping catalog order
+        keys = []
+        for t in trails:
+            key = data_agent.location_key(t.get("Lat"), t.get("Lng"))
+            if key and key not in keys:
+                keys.append(key)
+        self.batches = [keys[i:i + self.batch_size] for i in range(0, len(keys), self.batch_size)]
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def last_error(self):
+        """The most recent batch failure, or None if the last batch succeeded."""
+        return self.data_agent.last_refresh_error
+
+    def refresh_all(self):
+        """Refresh every batch once, back to back. Returns locations updated."""
+        return sum(self.data_agent.refresh_weather(batch) for batch in self.batches)
+
+    def start(self, warm=True):
+        """
+        Start refreshing in a daemon thread.
+
+        With warm=True the first pass runs back to back; pass warm=False after
+        calling refresh_all() yourself to go straight to the spread-out passes.
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(warm,), name="weather-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self, warm=True):
+        if not self.batches:
+            return
+        # Warm the whole snapshot straight away so early users never wait
+        if warm:
+            self.refresh_all()
+        if self._stop.wait(self.interval):
+            return
+
+        # After that, spread the batches evenly across the interval instead of bursting
+        delay = self.interval / len(self.batches)
+        while not self._stop.is_set():
+            for batch in self.batches:
+                self.data_agent.refresh_weather(batch)
+                if self._stop.wait(delay):
+                    return